@@ -1,5 +1,7 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.config import settings
@@ -7,6 +9,7 @@ import logging
 
 logger = logging.getLogger(__name__)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+bearer_scheme = HTTPBearer()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -31,3 +34,27 @@ def decode_token(token: str):
     except JWTError as e:
         logger.error(f"Token decode error: {str(e)}")
         return None
+
+def seed_users_dict() -> dict:
+    """Demo accounts that can log in without a users table row (development only)"""
+    if settings.ENVIRONMENT != "development":
+        return {}
+    return {
+        email: {"password_hash": get_password_hash(password), "role": role, "is_active": True}
+        for email, password, role in (
+            ("admin@example.com", "admin123", "admin"),
+            ("editor@example.com", "editor123", "editor"),
+            ("viewer@example.com", "viewer123", "viewer"),
+        )
+    }
+
+def get_token_payload(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)) -> dict:
+    payload = decode_token(credentials.credentials)
+    if not payload or "sub" not in payload:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return payload
+
+def require_editor(current_user: dict = Depends(get_token_payload)) -> dict:
+    if current_user.get("role") not in ("admin", "editor"):
+        raise HTTPException(status_code=403, detail="Editor role required")
+    return current_user
@@ -8,6 +8,7 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
     WORKER_INTERVAL: int = int(os.getenv("WORKER_INTERVAL", "60"))
+    MANIFEST_CACHE_TTL: int = int(os.getenv("MANIFEST_CACHE_TTL", "60"))
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,254 @@
+import logging
+from typing import Dict, List, Optional
+from sqlalchemy import delete, event, inspect, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models import Program, ProgramStatus, ProgramTopic, Topic, Lesson, LessonStatus, Term, FacetBitmap, ProgramFacetSlot
+
+logger = logging.getLogger(__name__)
+
+FACETS = ("topic", "language", "content_type", "is_paid")
+
+# Every published program has its bit set here; browsing starts from this set
+UNIVERSE = ("status", ProgramStatus.PUBLISHED.value)
+
+def _to_int(data: Optional[bytes]) -> int:
+    return int.from_bytes(data or b"", "little")
+
+def _to_bytes(bits: int) -> bytes:
+    return bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+def _popcount(bits: int) -> int:
+    return bin(bits).count("1")
+
+def _iter_bits(bits: int, skip: int, limit: int) -> List[int]:
+    """Return positions of set bits in ascending order, skipping the first `skip`"""
+    binary = bin(bits)[:1:-1]
+    positions = []
+    index = binary.find("1")
+    while index != -1 and len(positions) < limit:
+        if skip:
+            skip -= 1
+        else:
+            positions.append(index)
+        index = binary.find("1", index + 1)
+    return positions
+
+def program_facet_values(db: Session, program: Program) -> Dict[str, List[str]]:
+    """Facet values a program currently contributes; unpublished programs contribute none"""
+    if program.status != ProgramStatus.PUBLISHED:
+        return {}
+    lessons = db.query(Lesson.content_type, Lesson.is_paid).join(Term).filter(
+        Term.program_id == program.id,
+        Lesson.status == LessonStatus.PUBLISHED
+    ).distinct().all()
+    return {
+        UNIVERSE[0]: [UNIVERSE[1]],
+        "topic": sorted(str(topic.id) for topic in program.topics),
+        "language": sorted(set(program.languages_available or [])),
+        "content_type": sorted({row.content_type for row in lessons}),
+        "is_paid": sorted({"true" if row.is_paid else "false" for row in lessons}),
+    }
+
+def _pairs(values: Dict[str, List[str]]):
+    return {(facet, value) for facet, items in values.items() for value in items}
+
+def _bitmap_row(db: Session, facet: str, value: str, create: bool) -> Optional[FacetBitmap]:
+    """Lock the bitmap row for a facet value, creating it first if asked to"""
+    query = db.query(FacetBitmap).filter(FacetBitmap.facet == facet, FacetBitmap.value == value).with_for_update()
+    row = query.first()
+    if row is None and create:
+        # Flushed inside a savepoint so later lookups in this transaction see the row, and a
+        # concurrent transaction that created it first only costs a re-select
+        try:
+            with db.begin_nested():
+                db.add(FacetBitmap(facet=facet, value=value, bitmap=b"", count=0))
+        except IntegrityError:
+            pass
+        row = query.first()
+    return row
+
+def _apply_values(db: Session, slot: ProgramFacetSlot, values: Dict[str, List[str]]):
+    """Flip only the bits whose facet values differ from what the slot last recorded"""
+    old = _pairs(slot.facet_values or {})
+    new = _pairs(values)
+    if old == new:
+        return
+    bit = 1 << slot.id
+    for facet, value in sorted(old ^ new):
+        adding = (facet, value) in new
+        row = _bitmap_row(db, facet, value, create=adding)
+        if row is None:
+            continue
+        bits = _to_int(row.bitmap)
+        bits = bits | bit if adding else bits & ~bit
+        row.bitmap = _to_bytes(bits)
+        row.count = _popcount(bits)
+    slot.facet_values = values
+
+def reindex_program(db: Session, program: Program):
+    """Bring the facet bitmaps in line with the program's current state (no commit)"""
+    slot = db.query(ProgramFacetSlot).filter(ProgramFacetSlot.program_id == program.id).with_for_update().first()
+    if slot is None:
+        slot = ProgramFacetSlot(program_id=program.id, facet_values={})
+        db.add(slot)
+        db.flush()
+    _apply_values(db, slot, program_facet_values(db, program))
+    logger.info(f"Reindexed facets for program {program.id}")
+
+def _drop_program(db: Session, program_id):
+    """Clear a deleted program's bits and remove its slot before the program row goes"""
+    slot = db.query(ProgramFacetSlot).filter(ProgramFacetSlot.program_id == program_id).with_for_update().first()
+    if slot is None:
+        return
+    _apply_values(db, slot, {})
+    # Core delete runs immediately, so it always precedes the program DELETE in this flush
+    db.execute(delete(ProgramFacetSlot).where(ProgramFacetSlot.id == slot.id))
+    db.expunge(slot)
+
+def rebuild_facet_index(db: Session):
+    """Rebuild the bitmaps from scratch, e.g. to backfill after deploying faceted browsing"""
+    # Slots keep their ids (bit positions); only what they recorded is reset
+    db.execute(delete(FacetBitmap))
+    db.execute(update(ProgramFacetSlot).values(facet_values={}))
+    db.expire_all()
+    for program in db.query(Program).all():
+        reindex_program(db, program)
+    db.commit()
+
+def ensure_facet_index(db: Session):
+    """Backfill the index on startup if it has never been built"""
+    exists = db.query(FacetBitmap.facet).filter(
+        FacetBitmap.facet == UNIVERSE[0], FacetBitmap.value == UNIVERSE[1]
+    ).first()
+    if exists is None:
+        logger.info("Facet index missing, rebuilding")
+        rebuild_facet_index(db)
+
+# Keep the index in step with every write path: changes are collected when the
+# session flushes and applied just before it commits. Bulk UPDATE statements
+# bypass these hooks; the only one (bulk scheduling) never touches published state.
+_PROGRAM_FIELDS = ("status", "languages_available", "topics")
+_LESSON_FIELDS = ("status", "content_type", "is_paid", "term_id")
+
+def _changed(obj, fields) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+def _pending(session: Session):
+    return session.info.setdefault("facet_programs", set()), session.info.setdefault("facet_terms", set())
+
+@event.listens_for(Session, "before_flush")
+def _before_flush(session, flush_context, instances):
+    programs, _ = _pending(session)
+    for obj in session.deleted:
+        if isinstance(obj, Program):
+            _drop_program(session, obj.id)
+        elif isinstance(obj, Topic):
+            # The association rows vanish in this flush, so resolve the programs now
+            programs.update(program.id for program in obj.programs)
+        elif isinstance(obj, Term):
+            # Its lessons go with it, and afterwards the term can no longer be mapped to the program
+            programs.add(obj.program_id)
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    programs, terms = _pending(session)
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Program) and (obj in session.new or _changed(obj, _PROGRAM_FIELDS)):
+            programs.add(obj.id)
+        elif isinstance(obj, Lesson) and (obj in session.new or _changed(obj, _LESSON_FIELDS)):
+            terms.add(obj.term_id)
+            terms.update(inspect(obj).attrs.term_id.history.deleted or ())
+        elif isinstance(obj, Topic):
+            history = inspect(obj).attrs.programs.history
+            programs.update(program.id for program in list(history.added or ()) + list(history.deleted or ()))
+        elif isinstance(obj, ProgramTopic):
+            programs.add(obj.program_id)
+    for obj in session.deleted:
+        if isinstance(obj, Lesson):
+            terms.add(obj.term_id)
+        elif isinstance(obj, ProgramTopic):
+            programs.add(obj.program_id)
+
+@event.listens_for(Session, "before_commit")
+def _before_commit(session):
+    session.flush()
+    while session.info.get("facet_programs") or session.info.get("facet_terms"):
+        program_ids = session.info.pop("facet_programs", set())
+        term_ids = session.info.pop("facet_terms", set())
+        if term_ids:
+            program_ids |= {row.program_id for row in session.query(Term.program_id).filter(Term.id.in_(term_ids))}
+        if program_ids:
+            for program in session.query(Program).filter(Program.id.in_(program_ids)).all():
+                # Topics may have changed through ProgramTopic rows behind the loaded collection
+                session.expire(program, ["topics"])
+                reindex_program(session, program)
+        session.flush()
+
+@event.listens_for(Session, "after_soft_rollback")
+def _after_rollback(session, previous_transaction):
+    session.info.pop("facet_programs", None)
+    session.info.pop("facet_terms", None)
+
+def browse_programs(db: Session, filters: Dict[str, List[str]], offset: int = 0, limit: int = 20):
+    """Intersect facet bitmaps to return one page of published programs plus facet counts.
+
+    Values within a facet are OR-ed, facets are AND-ed. Each facet's counts
+    apply every filter except its own so the client can still widen a selection.
+    """
+    rows: Dict[str, Dict[str, FacetBitmap]] = {}
+    for row in db.query(FacetBitmap).all():
+        rows.setdefault(row.facet, {})[row.value] = row
+    universe_row = rows.get(UNIVERSE[0], {}).get(UNIVERSE[1])
+    universe = _to_int(universe_row.bitmap) if universe_row else 0
+
+    selected = {}
+    for facet, values in filters.items():
+        if facet in FACETS and values:
+            facet_rows = rows.get(facet, {})
+            bits = 0
+            for value in values:
+                if value in facet_rows:
+                    bits |= _to_int(facet_rows[value].bitmap)
+            selected[facet] = bits
+
+    counts: Dict[str, Dict[str, int]] = {}
+    if not selected:
+        # Unfiltered: the stored population counts are the answer, no bitmap needs decoding
+        result = universe
+        total = universe_row.count if universe_row else 0
+        for facet in FACETS:
+            counts[facet] = {value: row.count for value, row in rows.get(facet, {}).items() if row.count}
+    else:
+        result = universe
+        for bits in selected.values():
+            result &= bits
+        total = _popcount(result)
+        for facet in FACETS:
+            base = universe
+            for other, bits in selected.items():
+                if other != facet:
+                    base &= bits
+            counts[facet] = {}
+            for value, row in rows.get(facet, {}).items():
+                count = _popcount(_to_int(row.bitmap) & base)
+                if count:
+                    counts[facet][value] = count
+
+    slots = _iter_bits(result, offset, limit)
+    programs = []
+    if slots:
+        programs = db.query(Program).join(ProgramFacetSlot, ProgramFacetSlot.program_id == Program.id).filter(
+            ProgramFacetSlot.id.in_(slots)
+        ).order_by(ProgramFacetSlot.id).all()
+    return programs, total, counts
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        rebuild_facet_index(db)
+    finally:
+        db.close()
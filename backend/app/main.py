@@ -1,7 +1,9 @@
-main.pyfrom fastapi import FastAPI
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import Base, engine
+from app.database import Base, engine, SessionLocal
 from app import models
+from app.routers import auth, catalog, lessons
+from app.facets import ensure_facet_index
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,6 +26,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.include_router(auth.router)
+app.include_router(catalog.router)
+app.include_router(lessons.router)
+
+@app.on_event("startup")
+def backfill_facet_index():
+    db = SessionLocal()
+    try:
+        ensure_facet_index(db)
+    finally:
+        db.close()
+
 @app.get("/")
 def read_root():
     return {"message": "CMS API", "version": "1.0.0"}
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import logging
+from datetime import datetime
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models import Lesson, LessonAsset, LessonManifest, LessonStatus
+
+logger = logging.getLogger(__name__)
+
+def _neighbours(db: Session, lesson: Lesson):
+    """Return the published lessons directly before and after `lesson` in its term"""
+    rows = db.query(Lesson.id, Lesson.lesson_number, Lesson.title).filter(
+        Lesson.term_id == lesson.term_id,
+        Lesson.status == LessonStatus.PUBLISHED,
+        Lesson.id != lesson.id
+    ).order_by(Lesson.lesson_number).all()
+    previous = None
+    following = None
+    for row in rows:
+        if row.lesson_number < lesson.lesson_number:
+            previous = row
+        elif following is None:
+            following = row
+    return previous, following
+
+def _link(row):
+    if row is None:
+        return None
+    return {"id": str(row.id), "lesson_number": row.lesson_number, "title": row.title}
+
+def build_lesson_manifest(db: Session, lesson: Lesson, language: str, neighbours=None) -> dict:
+    """Assemble everything the player needs before playback for one lesson and language"""
+    previous, following = neighbours if neighbours is not None else _neighbours(db, lesson)
+    thumbnails = {}
+    for asset in lesson.assets:
+        if asset.asset_type != "thumbnail":
+            continue
+        # Prefer the requested language, fall back to the lesson's primary language
+        if asset.language == language or (asset.language == lesson.content_language_primary and asset.variant not in thumbnails):
+            thumbnails[asset.variant] = asset.url
+    subtitle_urls = lesson.subtitle_urls_by_language or {}
+    return {
+        "lesson_id": str(lesson.id),
+        "term_id": str(lesson.term_id),
+        "program_id": str(lesson.term.program_id),
+        "lesson_number": lesson.lesson_number,
+        "title": lesson.title,
+        "language": language,
+        "content_type": lesson.content_type,
+        "content_url": (lesson.content_urls_by_language or {}).get(language),
+        "duration_ms": lesson.duration_ms,
+        "is_paid": bool(lesson.is_paid),
+        "subtitles": [
+            {"language": lang, "url": subtitle_urls[lang]}
+            for lang in (lesson.subtitle_languages or []) if lang in subtitle_urls
+        ],
+        "thumbnails": thumbnails,
+        "previous": _link(previous),
+        "next": _link(following),
+    }
+
+def serialize_manifest(manifest: dict):
+    """Return the compact JSON payload and its ETag"""
+    payload = json.dumps(manifest, separators=(",", ":"), sort_keys=True)
+    etag = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+    return payload, etag
+
+def store_lesson_manifests(db: Session, lesson: Lesson, neighbours=None):
+    """Generate and upsert the manifest of every available language of `lesson` (no commit)"""
+    languages = list(lesson.content_languages_available or [])
+    existing = {m.language: m for m in db.query(LessonManifest).filter(LessonManifest.lesson_id == lesson.id).all()}
+    if neighbours is None:
+        neighbours = _neighbours(db, lesson)
+    now = datetime.utcnow()
+    for language in languages:
+        payload, etag = serialize_manifest(build_lesson_manifest(db, lesson, language, neighbours))
+        manifest = existing.pop(language, None)
+        if manifest is None:
+            db.add(LessonManifest(lesson_id=lesson.id, language=language, payload=payload, etag=etag, generated_at=now))
+        elif manifest.etag != etag:
+            manifest.payload = payload
+            manifest.etag = etag
+            manifest.generated_at = now
+    # Languages that are no longer offered must not keep serving stale manifests
+    for manifest in existing.values():
+        db.delete(manifest)
+
+def refresh_term_manifests(db: Session, term_id):
+    """Regenerate every published lesson's manifests in a term and drop those of unpublished lessons.
+
+    One query gives each lesson its neighbours, so a status change anywhere in
+    the term also fixes the next/previous links around it.
+    """
+    lessons = db.query(Lesson).filter(Lesson.term_id == term_id).order_by(Lesson.lesson_number).all()
+    published = [lesson for lesson in lessons if lesson.status == LessonStatus.PUBLISHED]
+    for index, lesson in enumerate(published):
+        previous = published[index - 1] if index else None
+        following = published[index + 1] if index + 1 < len(published) else None
+        # Assets may have been written through LessonAsset rows behind the loaded collection
+        db.expire(lesson, ["assets"])
+        store_lesson_manifests(db, lesson, (previous, following))
+    stale = [lesson.id for lesson in lessons if lesson.status != LessonStatus.PUBLISHED]
+    if stale:
+        db.query(LessonManifest).filter(LessonManifest.lesson_id.in_(stale)).delete(synchronize_session=False)
+    logger.info(f"Refreshed manifests for term {term_id}")
+
+# Manifests follow every write path the same way the facet index does: lessons and
+# assets touched in a flush mark their term, and the term is regenerated before commit.
+def _pending(session: Session):
+    return session.info.setdefault("manifest_terms", set()), session.info.setdefault("manifest_lessons", set())
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    terms, lessons = _pending(session)
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Lesson):
+            if obj in session.dirty and not session.is_modified(obj):
+                continue
+            terms.add(obj.term_id)
+            terms.update(inspect(obj).attrs.term_id.history.deleted or ())
+        elif isinstance(obj, LessonAsset):
+            lessons.add(obj.lesson_id)
+            lessons.update(inspect(obj).attrs.lesson_id.history.deleted or ())
+
+@event.listens_for(Session, "before_commit")
+def _before_commit(session):
+    session.flush()
+    while session.info.get("manifest_terms") or session.info.get("manifest_lessons"):
+        term_ids = session.info.pop("manifest_terms", set())
+        lesson_ids = session.info.pop("manifest_lessons", set())
+        if lesson_ids:
+            term_ids |= {row.term_id for row in session.query(Lesson.term_id).filter(Lesson.id.in_(lesson_ids))}
+        for term_id in term_ids:
+            refresh_term_manifests(session, term_id)
+        session.flush()
+
+@event.listens_for(Session, "after_soft_rollback")
+def _after_rollback(session, previous_transaction):
+    session.info.pop("manifest_terms", None)
+    session.info.pop("manifest_lessons", None)
+
+def get_lesson_manifest(db: Session, lesson_id, language: str = None):
+    """Return the stored manifest row for a published lesson, generating it if it is missing"""
+    lesson = db.query(Lesson).filter(Lesson.id == lesson_id, Lesson.status == LessonStatus.PUBLISHED).first()
+    if lesson is None:
+        return None
+    language = language or lesson.content_language_primary
+    if language not in (lesson.content_languages_available or []):
+        return None
+    query = db.query(LessonManifest).filter(LessonManifest.lesson_id == lesson.id, LessonManifest.language == language)
+    manifest = query.first()
+    if manifest is None:
+        # Lessons published before manifests existed are backfilled on first request
+        store_lesson_manifests(db, lesson)
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent first request stored it already (uq_lesson_manifest); use that row
+            db.rollback()
+        manifest = query.first()
+    return manifest
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, Text, Boolean, ARRAY, JSON, ForeignKey, Enum as SQLEnum, UniqueConstraint, Index
+from sqlalchemy import Column, String, Integer, DateTime, Text, Boolean, ARRAY, JSON, LargeBinary, ForeignKey, Enum as SQLEnum, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
@@ -35,6 +35,7 @@ class Program(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     terms = relationship("Term", back_populates="program", cascade="all, delete-orphan")
     assets = relationship("ProgramAsset", back_populates="program", cascade="all, delete-orphan")
+    topics = relationship("Topic", secondary="program_topics", back_populates="programs")
     __table_args__ = (Index("ix_program_status", "status"),)
 
 class Term(Base):
@@ -76,6 +77,27 @@ class Topic(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(255), unique=True, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    programs = relationship("Program", secondary="program_topics", back_populates="topics")
+
+class ProgramTopic(Base):
+    __tablename__ = "program_topics"
+    program_id = Column(UUID(as_uuid=True), ForeignKey("programs.id"), primary_key=True)
+    topic_id = Column(UUID(as_uuid=True), ForeignKey("topics.id"), primary_key=True)
+
+class ProgramFacetSlot(Base):
+    __tablename__ = "program_facet_slots"
+    id = Column(Integer, primary_key=True, autoincrement=True)  # bit position in facet bitmaps
+    program_id = Column(UUID(as_uuid=True), ForeignKey("programs.id", ondelete="CASCADE"), unique=True, nullable=False)
+    facet_values = Column(JSON, nullable=False, default={})  # values currently set in the bitmaps
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class FacetBitmap(Base):
+    __tablename__ = "facet_bitmaps"
+    facet = Column(String(50), primary_key=True)
+    value = Column(String(255), primary_key=True)
+    bitmap = Column(LargeBinary, nullable=False, default=b"")  # little-endian, bit N = slot N
+    count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class ProgramAsset(Base):
     __tablename__ = "program_assets"
@@ -101,6 +123,16 @@ class LessonAsset(Base):
     lesson = relationship("Lesson", back_populates="assets")
     __table_args__ = (UniqueConstraint("lesson_id", "language", "variant", "asset_type", name="uq_lesson_asset"),)
 
+class LessonManifest(Base):
+    __tablename__ = "lesson_manifests"
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    lesson_id = Column(UUID(as_uuid=True), ForeignKey("lessons.id", ondelete="CASCADE"), nullable=False)
+    language = Column(String(10), nullable=False)
+    payload = Column(Text, nullable=False)  # compact JSON, served verbatim
+    etag = Column(String(64), nullable=False)
+    generated_at = Column(DateTime, default=datetime.utcnow)
+    __table_args__ = (UniqueConstraint("lesson_id", "language", name="uq_lesson_manifest"),)
+
 class User(Base):
     __tablename__ = "users"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
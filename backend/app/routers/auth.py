@@ -1,8 +1,8 @@
-auth.py  from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.schemas import LoginRequest, TokenResponse, UserResponse
-from app.auth import create_access_token, get_password_hash, verify_password, seed_users_dict
+from app.auth import create_access_token, verify_password, seed_users_dict, get_token_payload
 from app.models import User, UserRole
 from datetime import timedelta
 import logging
@@ -61,13 +61,12 @@ def login(request: LoginRequest, db: Session = Depends(get_db)):
     )
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user(db: Session = Depends(get_db), token: str = None):
-    """Get current user from token"""
-    if not token:
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    
-    user = db.query(User).filter(User.email == token).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    return user
+def get_current_user(db: Session = Depends(get_db), payload: dict = Depends(get_token_payload)):
+    """Get current user from the bearer token"""
+    email = payload["sub"]
+    user = db.query(User).filter(User.email == email).first()
+    if user is not None:
+        return user
+    if email in DEMO_USERS:
+        return UserResponse(email=email, role=DEMO_USERS[email]["role"], is_active=DEMO_USERS[email]["is_active"])
+    raise HTTPException(status_code=404, detail="User not found")
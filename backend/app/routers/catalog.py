@@ -0,0 +1,117 @@
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.orm import Session
+from typing import Optional, Dict, List, Tuple
+from uuid import UUID
+from app.database import get_db
+from app.config import settings
+from app.auth import decode_token
+from app.manifests import get_lesson_manifest
+from app.facets import browse_programs
+from app.models import Lesson, LessonStatus
+from app.schemas import ProgramBrowseResponse, ProgramResponse
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/v1/catalog", tags=["catalog"])
+
+_bearer = HTTPBearer(auto_error=False)
+
+# (lesson_id, language) -> (expires_at, etag, payload)
+_manifest_cache: Dict[Tuple[str, Optional[str]], Tuple[float, str, str]] = {}
+
+def _etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag.strip('"') == etag:
+            return True
+    return False
+
+def _manifest_response(etag: str, payload: str, is_paid: bool, if_none_match: Optional[str]) -> Response:
+    # Paid manifests carry the media URL, so shared caches must not keep them
+    scope = "private" if is_paid else "public"
+    headers = {
+        "ETag": f'"{etag}"',
+        "Cache-Control": f"{scope}, max-age={settings.MANIFEST_CACHE_TTL}",
+    }
+    if is_paid:
+        headers["Vary"] = "Authorization"
+    if _etag_matches(etag, if_none_match):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload, media_type="application/json", headers=headers)
+
+def _check_entitled(credentials: Optional[HTTPAuthorizationCredentials]):
+    if credentials is None or not decode_token(credentials.credentials):
+        raise HTTPException(status_code=401, detail="Sign in to play paid lessons")
+
+@router.get("/lessons/{lesson_id}/manifest")
+def get_manifest(
+    lesson_id: UUID,
+    lang: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+    db: Session = Depends(get_db)
+):
+    """Player startup manifest for a published lesson; free lessons need no auth, paid ones a bearer token"""
+    # The paywall is checked against the lesson itself, never a cached or stored snapshot
+    lesson = db.query(Lesson.is_paid).filter(Lesson.id == lesson_id, Lesson.status == LessonStatus.PUBLISHED).first()
+    key = (str(lesson_id), lang)
+    if lesson is None:
+        _manifest_cache.pop(key, None)
+        raise HTTPException(status_code=404, detail="Manifest not found")
+    is_paid = bool(lesson.is_paid)
+    if is_paid:
+        _check_entitled(credentials)
+
+    cached = _manifest_cache.get(key)
+    if cached and cached[0] > time.monotonic():
+        _, etag, payload = cached
+    else:
+        manifest = get_lesson_manifest(db, lesson_id, lang)
+        if manifest is None:
+            _manifest_cache.pop(key, None)
+            raise HTTPException(status_code=404, detail="Manifest not found")
+        etag, payload = manifest.etag, manifest.payload
+        _manifest_cache[key] = (time.monotonic() + settings.MANIFEST_CACHE_TTL, etag, payload)
+    return _manifest_response(etag, payload, is_paid, if_none_match)
+
+@router.get("/programs", response_model=ProgramBrowseResponse)
+def browse(
+    topic: Optional[List[str]] = Query(None),
+    language: Optional[List[str]] = Query(None),
+    content_type: Optional[List[str]] = Query(None),
+    is_paid: Optional[bool] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Faceted browsing of published programs with counts per facet value (no auth)"""
+    filters = {
+        "topic": topic or [],
+        "language": language or [],
+        "content_type": content_type or [],
+        "is_paid": [] if is_paid is None else ["true" if is_paid else "false"],
+    }
+    programs, total, facets = browse_programs(db, filters, (page - 1) * page_size, page_size)
+    items = [
+        ProgramResponse(
+            id=str(p.id),
+            title=p.title,
+            description=p.description,
+            language_primary=p.language_primary,
+            languages_available=p.languages_available,
+            status=p.status.value,
+            published_at=p.published_at,
+            created_at=p.created_at,
+            updated_at=p.updated_at,
+        )
+        for p in programs
+    ]
+    return ProgramBrowseResponse(items=items, total=total, page=page, page_size=page_size, facets=facets)
@@ -1 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.auth import require_editor
+from app.schemas import LessonBulkSchedule, LessonBulkScheduleResponse
+from app.scheduling import ScheduleConflict, plan_schedule, apply_schedule
+import logging
 
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/v1/lessons", tags=["lessons"])
+
+@router.post("/bulk-schedule", response_model=LessonBulkScheduleResponse)
+def bulk_schedule(
+    request: LessonBulkSchedule,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_editor)
+):
+    """Schedule or reschedule many lessons at once; returns the diff only unless dry_run is false"""
+    try:
+        changes, skipped = plan_schedule(db, request, lock=not request.dry_run)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except ScheduleConflict as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=e.conflicts)
+
+    if request.dry_run:
+        return LessonBulkScheduleResponse(dry_run=True, changes=changes, skipped=skipped)
+
+    applied = apply_schedule(db, changes)
+    logger.info(f"{current_user['sub']} bulk scheduled {applied} lessons")
+    return LessonBulkScheduleResponse(dry_run=False, changes=changes, skipped=skipped, applied=applied)
@@ -0,0 +1,159 @@
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
+from sqlalchemy import DateTime, column, update, values
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Session
+from app.models import Lesson, LessonStatus, Program, Term
+from app.schemas import LessonBulkSchedule, LessonScheduleChange
+
+logger = logging.getLogger(__name__)
+
+# Published and archived lessons keep their dates; only these can be (re)scheduled
+SCHEDULABLE = (LessonStatus.DRAFT, LessonStatus.SCHEDULED)
+
+class ScheduleConflict(Exception):
+    def __init__(self, conflicts: List[str]):
+        super().__init__("; ".join(conflicts))
+        self.conflicts = conflicts
+
+def _utc(value: datetime) -> datetime:
+    """Columns store naive UTC, so normalise aware input before comparing or writing"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _uuid(value: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        raise ValueError(f"Invalid id: {value}")
+
+def _check_lesson_ids(db: Session, ids: List[str]) -> List[uuid.UUID]:
+    """Explicit ids must all exist and be schedulable, otherwise the diff would silently cover fewer lessons"""
+    requested = list(dict.fromkeys(_uuid(i) for i in ids))
+    found = dict(db.query(Lesson.id, Lesson.status).filter(Lesson.id.in_(requested)).all())
+    missing = [str(i) for i in requested if i not in found]
+    if missing:
+        raise ValueError(f"Lessons not found: {', '.join(missing)}")
+    locked = [f"Lesson {i} is {found[i].value} and cannot be rescheduled" for i in requested if found[i] not in SCHEDULABLE]
+    if locked:
+        raise ScheduleConflict(locked)
+    return requested
+
+def _check_exists(db: Session, model, id_value: str, label: str) -> uuid.UUID:
+    target_id = _uuid(id_value)
+    if db.query(model.id).filter(model.id == target_id).first() is None:
+        raise ValueError(f"{label} not found: {id_value}")
+    return target_id
+
+def plan_schedule(db: Session, request: LessonBulkSchedule, lock: bool = False) -> Tuple[List[LessonScheduleChange], List[str]]:
+    """Compute the publish_at/status diff for the targeted lessons and validate it against term order.
+
+    Returns the planned changes and the ids of lessons skipped because a shift
+    has no date to move.
+    """
+    query = db.query(Lesson.id, Lesson.term_id, Lesson.lesson_number, Lesson.status, Lesson.publish_at).join(Term).filter(
+        Lesson.status.in_(SCHEDULABLE)
+    )
+    if request.program_id is not None:
+        query = query.filter(Term.program_id == _check_exists(db, Program, request.program_id, "Program"))
+    elif request.term_id is not None:
+        query = query.filter(Lesson.term_id == _check_exists(db, Term, request.term_id, "Term"))
+    else:
+        lesson_ids = _check_lesson_ids(db, request.lesson_ids)
+        query = query.filter(Lesson.id.in_(lesson_ids))
+    if lock:
+        query = query.with_for_update(of=Lesson)
+    # program_id and term_id keep the cadence order stable when lesson_ids span programs
+    lessons = query.order_by(Term.program_id, Term.term_number, Term.id, Lesson.lesson_number).all()
+
+    now = datetime.utcnow()
+    changes = []
+    skipped = []
+    conflicts = []
+    for lesson in lessons:
+        if request.shift_seconds is not None:
+            if lesson.publish_at is None:
+                skipped.append(str(lesson.id))
+                continue
+            new_publish_at = lesson.publish_at + timedelta(seconds=request.shift_seconds)
+            # Moving a tentative date must not queue a draft for automatic publishing
+            new_status = lesson.status
+        else:
+            if request.publish_at is not None:
+                new_publish_at = _utc(request.publish_at)
+            else:
+                new_publish_at = _utc(request.cadence.start) + timedelta(days=request.cadence.interval_days * len(changes))
+            new_status = LessonStatus.SCHEDULED
+        if new_publish_at <= now:
+            conflicts.append(f"Lesson {lesson.id} would be scheduled in the past ({new_publish_at.isoformat()})")
+        changes.append(LessonScheduleChange(
+            lesson_id=str(lesson.id),
+            term_id=str(lesson.term_id),
+            lesson_number=lesson.lesson_number,
+            old_publish_at=lesson.publish_at,
+            new_publish_at=new_publish_at,
+            old_status=lesson.status.value,
+            new_status=new_status.value,
+        ))
+
+    conflicts.extend(_order_conflicts(db, changes))
+    if conflicts:
+        raise ScheduleConflict(conflicts)
+    return changes, skipped
+
+def _order_conflicts(db: Session, changes: List[LessonScheduleChange]) -> List[str]:
+    """Within each term, lessons must release in lesson_number order (uq_term_lesson)"""
+    if not changes:
+        return []
+    planned = {uuid.UUID(c.lesson_id): c.new_publish_at for c in changes}
+    term_ids = {uuid.UUID(c.term_id) for c in changes}
+    rows = db.query(
+        Lesson.id, Lesson.term_id, Lesson.lesson_number, Lesson.status, Lesson.publish_at, Lesson.published_at
+    ).filter(Lesson.term_id.in_(term_ids)).order_by(Lesson.term_id, Lesson.lesson_number).all()
+
+    conflicts = []
+    previous = {}
+    for row in rows:
+        if row.status == LessonStatus.ARCHIVED:
+            continue
+        if row.id in planned:
+            release = planned[row.id]
+        elif row.status == LessonStatus.PUBLISHED:
+            release = row.published_at
+        else:
+            release = row.publish_at
+        if release is None:
+            continue
+        last = previous.get(row.term_id)
+        if last is not None and release < last[1]:
+            conflicts.append(
+                f"Lesson {row.lesson_number} in term {row.term_id} would release before lesson {last[0]}"
+            )
+        previous[row.term_id] = (row.lesson_number, release)
+    return conflicts
+
+def apply_schedule(db: Session, changes: List[LessonScheduleChange]) -> int:
+    """Write the planned times with a single UPDATE ... FROM (VALUES ...) and commit"""
+    if not changes:
+        return 0
+    planned = values(
+        column("id", UUID(as_uuid=True)),
+        column("publish_at", DateTime),
+        column("status", Lesson.__table__.c.status.type),
+        name="planned",
+    ).data([(uuid.UUID(c.lesson_id), c.new_publish_at, LessonStatus(c.new_status)) for c in changes])
+    stmt = update(Lesson).where(
+        Lesson.id == planned.c.id,
+        Lesson.status.in_(SCHEDULABLE)
+    ).values(
+        publish_at=planned.c.publish_at,
+        status=planned.c.status,
+        updated_at=datetime.utcnow()
+    ).execution_options(synchronize_session=False)
+    result = db.execute(stmt)
+    db.commit()
+    logger.info(f"Bulk scheduled {result.rowcount} lessons")
+    return result.rowcount
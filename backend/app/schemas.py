@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, List, Dict
 from datetime import datetime
 from enum import Enum
@@ -28,6 +28,13 @@ class TokenResponse(BaseModel):
     token_type: str = "bearer"
     user: Dict
 
+class UserResponse(BaseModel):
+    email: str
+    role: UserRoleEnum
+    is_active: bool
+    class Config:
+        from_attributes = True
+
 class ProgramCreate(BaseModel):
     title: str
     description: Optional[str] = None
@@ -50,6 +57,44 @@ class LessonUpdate(BaseModel):
     status: Optional[LessonStatusEnum] = None
     publish_at: Optional[datetime] = None
 
+class ScheduleCadence(BaseModel):
+    start: datetime
+    interval_days: int = Field(7, ge=1)
+
+class LessonBulkSchedule(BaseModel):
+    program_id: Optional[str] = None
+    term_id: Optional[str] = None
+    lesson_ids: Optional[List[str]] = None
+    publish_at: Optional[datetime] = None
+    shift_seconds: Optional[int] = None
+    cadence: Optional[ScheduleCadence] = None
+    dry_run: bool = True
+
+    @model_validator(mode="after")
+    def check_target_and_mode(self):
+        targets = [self.program_id, self.term_id, self.lesson_ids]
+        if sum(t is not None for t in targets) != 1:
+            raise ValueError("Provide exactly one of program_id, term_id or lesson_ids")
+        modes = [self.publish_at, self.shift_seconds, self.cadence]
+        if sum(m is not None for m in modes) != 1:
+            raise ValueError("Provide exactly one of publish_at, shift_seconds or cadence")
+        return self
+
+class LessonScheduleChange(BaseModel):
+    lesson_id: str
+    term_id: str
+    lesson_number: int
+    old_publish_at: Optional[datetime]
+    new_publish_at: datetime
+    old_status: LessonStatusEnum
+    new_status: LessonStatusEnum
+
+class LessonBulkScheduleResponse(BaseModel):
+    dry_run: bool
+    changes: List[LessonScheduleChange]
+    skipped: List[str] = []
+    applied: int = 0
+
 class ProgramResponse(BaseModel):
     id: str
     title: str
@@ -62,3 +107,10 @@ class ProgramResponse(BaseModel):
     updated_at: datetime
     class Config:
         from_attributes = True
+
+class ProgramBrowseResponse(BaseModel):
+    items: List[ProgramResponse]
+    total: int
+    page: int
+    page_size: int
+    facets: Dict[str, Dict[str, int]]
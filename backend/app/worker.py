@@ -3,9 +3,11 @@ import logging
 from datetime import datetime
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from app.models import Lesson, PublishingLog
+from app.models import Lesson, LessonStatus
 from app.config import settings
 from app.database import SessionLocal
+import app.manifests  # noqa: F401 - registers the hooks that regenerate lesson manifests on commit
+import app.facets  # noqa: F401 - registers the hooks that keep facet bitmaps current on commit
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -28,39 +30,27 @@ async def publish_scheduled_lessons():
         now = datetime.utcnow()
         
         # Find lessons that should be published
-        lessons_to_publish = db.query(Lesson).filter(
-            Lesson.status == "scheduled",
-            Lesson.scheduled_publish_time <= now
-        ).all()
+        due_ids = [row.id for row in db.query(Lesson.id).filter(
+            Lesson.status == LessonStatus.SCHEDULED,
+            Lesson.publish_at <= now
+        ).all()]
         
-        for lesson in lessons_to_publish:
+        for lesson_id in due_ids:
             try:
-                lesson.status = "published"
+                # Re-check under a row lock so concurrent workers publish each lesson exactly once
+                lesson = db.query(Lesson).filter(
+                    Lesson.id == lesson_id,
+                    Lesson.status == LessonStatus.SCHEDULED
+                ).with_for_update(skip_locked=True).first()
+                if lesson is None:
+                    continue
+                lesson.status = LessonStatus.PUBLISHED
                 lesson.published_at = now
-                
-                # Log the publishing action
-                log_entry = PublishingLog(
-                    lesson_id=lesson.id,
-                    action="published",
-                    timestamp=now,
-                    status="success",
-                    details=f"Lesson auto-published at {now}"
-                )
-                db.add(log_entry)
                 db.commit()
-                logger.info(f"Published lesson {lesson.id}")
+                logger.info(f"Published lesson {lesson_id} at {now}")
             except Exception as e:
                 db.rollback()
-                logger.error(f"Failed to publish lesson {lesson.id}: {str(e)}")
-                log_entry = PublishingLog(
-                    lesson_id=lesson.id,
-                    action="publish",
-                    timestamp=now,
-                    status="failed",
-                    details=f"Error: {str(e)}"
-                )
-                db.add(log_entry)
-                db.commit()
+                logger.error(f"Failed to publish lesson {lesson_id}: {str(e)}")
     except Exception as e:
         logger.error(f"Worker error: {str(e)}")
     finally:
@@ -76,8 +66,8 @@ async def worker_loop():
         except Exception as e:
             logger.error(f"Worker exception: {str(e)}")
         
-        # Wait 60 seconds before next iteration
-        await asyncio.sleep(60)
+        await asyncio.sleep(settings.WORKER_INTERVAL)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     asyncio.run(worker_loop())
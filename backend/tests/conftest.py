@@ -0,0 +1,102 @@
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+import pytest
+import sqlalchemy
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Point TEST_DATABASE_URL at a scratch PostgreSQL database to run everything, including the
+# PostgreSQL-only bulk UPDATE. Otherwise the models' PostgreSQL column types are mapped onto
+# SQLite equivalents before app.models is imported.
+os.environ["ENVIRONMENT"] = "test"
+if os.getenv("TEST_DATABASE_URL"):
+    os.environ["DATABASE_URL"] = os.environ["TEST_DATABASE_URL"]
+else:
+    _db_file = os.path.join(tempfile.mkdtemp(), "test.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+    sqlalchemy.ARRAY = lambda *args, **kwargs: sqlalchemy.JSON()
+    postgresql.UUID = lambda as_uuid=True: sqlalchemy.Uuid()
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app import models  # noqa: E402
+import app.facets  # noqa: E402,F401 - registers the facet session hooks
+import app.manifests  # noqa: E402,F401 - registers the manifest session hooks
+
+requires_postgresql = pytest.mark.skipif(
+    engine.dialect.name != "postgresql", reason="needs TEST_DATABASE_URL pointing at PostgreSQL"
+)
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _sqlite_connect(dbapi_connection, connection_record):
+        # Let SQLAlchemy drive transactions so SAVEPOINTs work, and enforce foreign keys like PostgreSQL
+        dbapi_connection.isolation_level = None
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    @event.listens_for(engine, "begin")
+    def _sqlite_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def make_program(db):
+    def make(title="Program", status=models.ProgramStatus.PUBLISHED, languages=("en",), topics=()):
+        program = models.Program(
+            title=title,
+            language_primary=languages[0],
+            languages_available=list(languages),
+            status=status,
+            topics=list(topics),
+        )
+        db.add(program)
+        db.flush()
+        return program
+    return make
+
+@pytest.fixture
+def make_term(db):
+    def make(program, term_number=1):
+        term = models.Term(program_id=program.id, term_number=term_number, title=f"Term {term_number}")
+        db.add(term)
+        db.flush()
+        return term
+    return make
+
+@pytest.fixture
+def make_lesson(db):
+    def make(term, lesson_number=1, status=models.LessonStatus.DRAFT, content_type="video", is_paid=False,
+             publish_at=None, published_at=None, languages=("en",)):
+        lesson = models.Lesson(
+            term_id=term.id,
+            lesson_number=lesson_number,
+            title=f"Lesson {lesson_number}",
+            content_type=content_type,
+            duration_ms=60000,
+            is_paid=is_paid,
+            content_language_primary=languages[0],
+            content_languages_available=list(languages),
+            content_urls_by_language={lang: f"https://cdn.example.com/{lesson_number}/{lang}.mp4" for lang in languages},
+            subtitle_languages=[],
+            subtitle_urls_by_language={},
+            status=status,
+            publish_at=publish_at,
+            published_at=published_at or (datetime.utcnow() if status == models.LessonStatus.PUBLISHED else None),
+        )
+        db.add(lesson)
+        db.flush()
+        return lesson
+    return make
@@ -0,0 +1,142 @@
+from app.facets import browse_programs, rebuild_facet_index, ensure_facet_index
+from app.models import FacetBitmap, LessonStatus, Program, ProgramFacetSlot, ProgramStatus, Topic
+
+def browse(db, **filters):
+    programs, total, counts = browse_programs(db, {k: v for k, v in filters.items()})
+    # Pages follow slot order, which is assignment order rather than title order
+    return sorted(p.title for p in programs), total, counts
+
+def test_publish_and_unpublish_program(db, make_program, make_term, make_lesson):
+    program = make_program("A", status=ProgramStatus.DRAFT)
+    make_lesson(make_term(program), status=LessonStatus.PUBLISHED)
+    db.commit()
+    assert browse(db)[1] == 0
+
+    program.status = ProgramStatus.PUBLISHED
+    db.commit()
+    titles, total, counts = browse(db)
+    assert (titles, total) == (["A"], 1)
+    assert counts["content_type"] == {"video": 1}
+
+    program.status = ProgramStatus.ARCHIVED
+    db.commit()
+    titles, total, counts = browse(db)
+    assert (titles, total) == ([], 0)
+    assert counts == {"topic": {}, "language": {}, "content_type": {}, "is_paid": {}}
+
+def test_lesson_content_type_change_and_archive(db, make_program, make_term, make_lesson):
+    lesson = make_lesson(make_term(make_program("A")), status=LessonStatus.PUBLISHED, content_type="video")
+    db.commit()
+    lesson.content_type = "article"
+    db.commit()
+    assert browse(db)[2]["content_type"] == {"article": 1}
+
+    lesson.status = LessonStatus.ARCHIVED
+    db.commit()
+    counts = browse(db)[2]
+    assert counts["content_type"] == {}
+    assert counts["is_paid"] == {}
+
+def test_topic_add_and_remove_from_program_side(db, make_program):
+    math = Topic(name="math")
+    program = make_program("A")
+    db.commit()
+    program.topics.append(math)
+    db.commit()
+    assert browse(db)[2]["topic"] == {str(math.id): 1}
+    program.topics.remove(math)
+    db.commit()
+    assert browse(db)[2]["topic"] == {}
+
+def test_topic_add_and_remove_from_topic_side(db, make_program):
+    art = Topic(name="art")
+    db.add(art)
+    program = make_program("A")
+    db.commit()
+    art.programs.append(program)
+    db.commit()
+    assert browse(db, topic=[str(art.id)])[:2] == (["A"], 1)
+    art.programs.remove(program)
+    db.commit()
+    assert browse(db, topic=[str(art.id)])[:2] == ([], 0)
+
+def test_new_facet_value_shared_by_programs_in_one_commit(db, make_program):
+    topic = Topic(name="shared")
+    make_program("A", languages=("te",), topics=[topic])
+    make_program("B", languages=("te",), topics=[topic])
+    db.commit()
+    counts = browse(db)[2]
+    assert counts["language"] == {"te": 2}
+    assert counts["topic"] == {str(topic.id): 2}
+    assert db.query(FacetBitmap).filter(FacetBitmap.facet == "language").count() == 1
+
+def test_term_deletion_drops_its_lesson_facets(db, make_program, make_term, make_lesson):
+    program = make_program("A")
+    term = make_term(program)
+    make_lesson(term, 1, status=LessonStatus.PUBLISHED, content_type="video")
+    make_lesson(term, 2, status=LessonStatus.PUBLISHED, content_type="audio", is_paid=True)
+    db.commit()
+    assert browse(db)[2]["is_paid"] == {"false": 1, "true": 1}
+
+    db.delete(term)
+    db.commit()
+    titles, total, counts = browse(db)
+    assert (titles, total) == (["A"], 1)
+    assert counts["content_type"] == {}
+    assert counts["is_paid"] == {}
+
+def test_program_deletion_clears_bits_and_slot(db, make_program, make_term, make_lesson):
+    program = make_program("A", languages=("en", "te"))
+    make_lesson(make_term(program), status=LessonStatus.PUBLISHED)
+    make_program("B")
+    db.commit()
+    db.delete(program)
+    db.commit()
+    titles, total, counts = browse(db)
+    assert (titles, total) == (["B"], 1)
+    assert counts["language"] == {"en": 1}
+    assert db.query(ProgramFacetSlot).count() == 1
+
+def test_rebuild_with_several_programs(db, make_program, make_term, make_lesson):
+    for title in ("A", "B", "C"):
+        make_lesson(make_term(make_program(title)), status=LessonStatus.PUBLISHED)
+    make_program("Draft", status=ProgramStatus.DRAFT)
+    db.commit()
+    before = browse(db)
+
+    db.query(FacetBitmap).delete()
+    db.commit()
+    ensure_facet_index(db)
+    assert browse(db) == before
+    rebuild_facet_index(db)
+    assert browse(db) == before
+    assert before[:2] == (["A", "B", "C"], 3)
+
+def test_filtered_and_unfiltered_counts(db, make_program, make_term, make_lesson):
+    math = Topic(name="math")
+    a = make_program("A", languages=("en",), topics=[math])
+    b = make_program("B", languages=("en", "te"))
+    c = make_program("C", languages=("te",), topics=[math])
+    make_lesson(make_term(a), status=LessonStatus.PUBLISHED, is_paid=True)
+    make_lesson(make_term(b), status=LessonStatus.PUBLISHED)
+    make_lesson(make_term(c), status=LessonStatus.PUBLISHED, content_type="article")
+    db.commit()
+
+    titles, total, counts = browse(db)
+    assert (titles, total) == (["A", "B", "C"], 3)
+    assert counts["language"] == {"en": 2, "te": 2}
+    assert counts["is_paid"] == {"true": 1, "false": 2}
+
+    titles, total, counts = browse(db, language=["te"])
+    assert (titles, total) == (["B", "C"], 2)
+    # A facet's own filter is ignored for its counts, the others apply
+    assert counts["language"] == {"en": 2, "te": 2}
+    assert counts["topic"] == {str(math.id): 1}
+    assert counts["content_type"] == {"video": 1, "article": 1}
+
+    titles, total, _ = browse(db, language=["te"], topic=[str(math.id)])
+    assert (titles, total) == (["C"], 1)
+
+    pages = [browse_programs(db, {}, offset=offset, limit=2)[0] for offset in (0, 2)]
+    assert [len(page) for page in pages] == [2, 1]
+    assert sorted(p.title for page in pages for p in page) == ["A", "B", "C"]
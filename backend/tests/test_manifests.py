@@ -0,0 +1,128 @@
+import json
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.auth import create_access_token
+from app.manifests import get_lesson_manifest
+from app.models import LessonAsset, LessonManifest, LessonStatus
+from app.routers import catalog
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    catalog._manifest_cache.clear()
+    yield
+    catalog._manifest_cache.clear()
+
+def manifest(db, lesson, language="en"):
+    row = db.query(LessonManifest).filter(LessonManifest.lesson_id == lesson.id, LessonManifest.language == language).first()
+    return json.loads(row.payload) if row else None
+
+def serve(db, lesson, credentials=None, if_none_match=None):
+    return catalog.get_manifest(lesson_id=lesson.id, lang=None, if_none_match=if_none_match, credentials=credentials, db=db)
+
+def test_publish_generates_manifest_and_links_neighbours(db, make_program, make_term, make_lesson):
+    term = make_term(make_program())
+    first = make_lesson(term, 1, status=LessonStatus.PUBLISHED)
+    second = make_lesson(term, 2, status=LessonStatus.SCHEDULED)
+    db.commit()
+    assert manifest(db, first)["next"] is None
+    assert manifest(db, second) is None
+
+    second.status = LessonStatus.PUBLISHED
+    db.commit()
+    assert manifest(db, first)["next"]["id"] == str(second.id)
+    assert manifest(db, second)["previous"]["id"] == str(first.id)
+    assert manifest(db, second)["content_url"] == "https://cdn.example.com/2/en.mp4"
+
+def test_archiving_relinks_neighbours_and_drops_manifest(db, make_program, make_term, make_lesson):
+    term = make_term(make_program())
+    first, middle, last = [make_lesson(term, n, status=LessonStatus.PUBLISHED) for n in (1, 2, 3)]
+    db.commit()
+    middle.status = LessonStatus.ARCHIVED
+    db.commit()
+    assert manifest(db, first)["next"]["id"] == str(last.id)
+    assert manifest(db, last)["previous"]["id"] == str(first.id)
+    assert manifest(db, middle) is None
+
+def test_content_and_asset_changes_regenerate(db, make_program, make_term, make_lesson):
+    lesson = make_lesson(make_term(make_program()), status=LessonStatus.PUBLISHED)
+    db.commit()
+    etag = db.query(LessonManifest.etag).filter(LessonManifest.lesson_id == lesson.id).scalar()
+
+    lesson.title = "Renamed"
+    lesson.content_urls_by_language = {"en": "https://cdn.example.com/new.mp4"}
+    lesson.subtitle_languages = ["en"]
+    lesson.subtitle_urls_by_language = {"en": "https://cdn.example.com/en.vtt"}
+    db.commit()
+    body = manifest(db, lesson)
+    assert body["title"] == "Renamed"
+    assert body["content_url"] == "https://cdn.example.com/new.mp4"
+    assert body["subtitles"] == [{"language": "en", "url": "https://cdn.example.com/en.vtt"}]
+
+    db.add(LessonAsset(lesson_id=lesson.id, language="en", variant="landscape", asset_type="thumbnail", url="https://cdn.example.com/t.jpg"))
+    db.commit()
+    assert manifest(db, lesson)["thumbnails"] == {"landscape": "https://cdn.example.com/t.jpg"}
+    assert db.query(LessonManifest.etag).filter(LessonManifest.lesson_id == lesson.id).scalar() != etag
+
+def test_paywall_follows_the_live_lesson(db, make_program, make_term, make_lesson):
+    lesson = make_lesson(make_term(make_program()), status=LessonStatus.PUBLISHED)
+    db.commit()
+    response = serve(db, lesson)
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"].startswith("public")
+
+    # Still cached from the free response, but the lesson is now paid
+    lesson.is_paid = True
+    db.commit()
+    with pytest.raises(HTTPException) as exc:
+        serve(db, lesson)
+    assert exc.value.status_code == 401
+
+    token = create_access_token({"sub": "viewer@example.com", "role": "viewer"})
+    response = serve(db, lesson, HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"].startswith("private")
+
+    lesson.status = LessonStatus.ARCHIVED
+    db.commit()
+    with pytest.raises(HTTPException) as exc:
+        serve(db, lesson)
+    assert exc.value.status_code == 404
+
+def test_if_none_match(db, make_program, make_term, make_lesson):
+    lesson = make_lesson(make_term(make_program()), status=LessonStatus.PUBLISHED)
+    db.commit()
+    etag = serve(db, lesson).headers["ETag"]
+    assert serve(db, lesson, if_none_match=f"W/{etag}").status_code == 304
+    assert serve(db, lesson, if_none_match="*").status_code == 304
+    assert serve(db, lesson, if_none_match='"other"').status_code == 200
+
+def test_backfill_survives_a_concurrent_first_request(db, make_program, make_term, make_lesson):
+    lesson = make_lesson(make_term(make_program()), status=LessonStatus.PUBLISHED)
+    db.commit()
+    db.query(LessonManifest).delete()
+    db.commit()
+
+    # The other request stores the row after our lookup found nothing; ours is built from that stale view
+    from app.database import SessionLocal
+    from app import manifests
+    original = manifests.store_lesson_manifests
+    def racing_store(session, target, neighbours=None):
+        lesson_id = target.id
+        # SQLite locks the file for open readers; end ours so the other request can commit first
+        session.commit()
+        other = SessionLocal()
+        try:
+            original(other, other.get(type(target), lesson_id))
+            other.commit()
+        finally:
+            other.close()
+        session.add(LessonManifest(lesson_id=lesson_id, language="en", payload="{}", etag="stale"))
+    manifests.store_lesson_manifests = racing_store
+    try:
+        row = get_lesson_manifest(db, lesson.id)
+    finally:
+        manifests.store_lesson_manifests = original
+    assert row is not None and json.loads(row.payload)["lesson_id"] == str(lesson.id)
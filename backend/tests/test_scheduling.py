@@ -0,0 +1,133 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.models import Lesson, LessonStatus
+from app.routers.lessons import bulk_schedule
+from app.schemas import LessonBulkSchedule
+from conftest import requires_postgresql
+
+EDITOR = {"sub": "editor@example.com", "role": "editor"}
+
+def schedule(db, **fields):
+    return bulk_schedule(LessonBulkSchedule(**fields), db=db, current_user=EDITOR)
+
+def rejected(db, **fields):
+    with pytest.raises(HTTPException) as exc:
+        schedule(db, **fields)
+    return exc.value
+
+def tomorrow(hours=0):
+    return datetime.utcnow().replace(microsecond=0) + timedelta(days=1, hours=hours)
+
+def test_cadence_follows_term_then_lesson_order(db, make_program, make_term, make_lesson):
+    program = make_program()
+    second_term = make_term(program, 2)
+    first_term = make_term(program, 1)
+    lessons = [make_lesson(second_term, 1), make_lesson(first_term, 2), make_lesson(first_term, 1)]
+    db.commit()
+    start = tomorrow()
+
+    result = schedule(db, program_id=str(program.id), cadence={"start": start, "interval_days": 7})
+    assert result.dry_run and result.applied == 0
+    order = [(c.term_id, c.lesson_number) for c in result.changes]
+    assert order == [(str(first_term.id), 1), (str(first_term.id), 2), (str(second_term.id), 1)]
+    assert [c.new_publish_at for c in result.changes] == [start + timedelta(days=7 * i) for i in range(3)]
+    assert {(c.old_status, c.new_status) for c in result.changes} == {(LessonStatus.DRAFT, LessonStatus.SCHEDULED)}
+    # Dry run writes nothing
+    assert all(db.get(Lesson, lesson.id).publish_at is None for lesson in lessons)
+
+def test_cadence_is_deterministic_across_programs(db, make_program, make_term, make_lesson):
+    lessons = [make_lesson(make_term(make_program(title)), 1) for title in ("A", "B", "C")]
+    db.commit()
+    ids = [str(lesson.id) for lesson in lessons]
+    plans = [
+        [c.lesson_id for c in schedule(db, lesson_ids=order, cadence={"start": tomorrow()}).changes]
+        for order in (ids, ids[::-1])
+    ]
+    assert plans[0] == plans[1]
+
+@requires_postgresql
+def test_apply_writes_dates_and_statuses(db, make_program, make_term, make_lesson):
+    term = make_term(make_program())
+    first, second = make_lesson(term, 1), make_lesson(term, 2)
+    db.commit()
+    start = tomorrow()
+    result = schedule(db, term_id=str(term.id), cadence={"start": start, "interval_days": 1}, dry_run=False)
+    assert result.applied == 2
+    db.expire_all()
+    assert (first.status, first.publish_at) == (LessonStatus.SCHEDULED, start)
+    assert (second.status, second.publish_at) == (LessonStatus.SCHEDULED, start + timedelta(days=1))
+
+def test_shift_skips_undated_and_keeps_drafts(db, make_program, make_term, make_lesson):
+    base = tomorrow()
+    term = make_term(make_program())
+    make_lesson(term, 1, publish_at=base)
+    make_lesson(term, 2, status=LessonStatus.SCHEDULED, publish_at=base + timedelta(hours=1))
+    undated = make_lesson(term, 3)
+    db.commit()
+
+    result = schedule(db, term_id=str(term.id), shift_seconds=7 * 86400)
+    assert result.skipped == [str(undated.id)]
+    assert [(c.lesson_number, c.new_publish_at, c.old_status, c.new_status) for c in result.changes] == [
+        (1, base + timedelta(days=7), LessonStatus.DRAFT, LessonStatus.DRAFT),
+        (2, base + timedelta(days=7, hours=1), LessonStatus.SCHEDULED, LessonStatus.SCHEDULED),
+    ]
+
+@requires_postgresql
+def test_shift_apply_keeps_drafts(db, make_program, make_term, make_lesson):
+    base = tomorrow()
+    term = make_term(make_program())
+    dated_draft = make_lesson(term, 1, publish_at=base)
+    undated = make_lesson(term, 2)
+    db.commit()
+    assert schedule(db, term_id=str(term.id), shift_seconds=3600, dry_run=False).applied == 1
+    db.expire_all()
+    assert (dated_draft.status, dated_draft.publish_at) == (LessonStatus.DRAFT, base + timedelta(hours=1))
+    assert undated.publish_at is None
+
+def test_order_conflict_with_published_lesson(db, make_program, make_term, make_lesson):
+    term = make_term(make_program())
+    make_lesson(term, 1, status=LessonStatus.PUBLISHED, published_at=tomorrow(2))
+    later = make_lesson(term, 2)
+    db.commit()
+    error = rejected(db, lesson_ids=[str(later.id)], publish_at=tomorrow())
+    assert error.status_code == 409
+    assert error.detail == [f"Lesson 2 in term {term.id} would release before lesson 1"]
+
+def test_order_conflict_within_plan_and_unplanned_lessons(db, make_program, make_term, make_lesson):
+    term = make_term(make_program())
+    make_lesson(term, 1, status=LessonStatus.SCHEDULED, publish_at=tomorrow(5))
+    second = make_lesson(term, 2)
+    make_lesson(term, 3, status=LessonStatus.ARCHIVED, publish_at=tomorrow(-20))
+    db.commit()
+    assert rejected(db, lesson_ids=[str(second.id)], publish_at=tomorrow()).status_code == 409
+    # Archived lessons do not take part in the ordering
+    assert len(schedule(db, lesson_ids=[str(second.id)], publish_at=tomorrow(6)).changes) == 1
+
+def test_past_times_are_rejected(db, make_program, make_term, make_lesson):
+    lesson = make_lesson(make_term(make_program()), 1)
+    db.commit()
+    error = rejected(db, lesson_ids=[str(lesson.id)], publish_at=datetime.utcnow() - timedelta(hours=1))
+    assert error.status_code == 409
+    assert "in the past" in error.detail[0]
+
+def test_unknown_targets_are_422(db, make_program, make_term, make_lesson):
+    make_lesson(make_term(make_program()), 1)
+    db.commit()
+    missing = str(uuid.UUID(int=0))
+    for field in ("program_id", "term_id"):
+        error = rejected(db, **{field: missing}, publish_at=tomorrow())
+        assert (error.status_code, error.detail) == (422, f"{field.split('_')[0].capitalize()} not found: {missing}")
+    error = rejected(db, lesson_ids=[missing], publish_at=tomorrow())
+    assert (error.status_code, error.detail) == (422, f"Lessons not found: {missing}")
+    assert rejected(db, term_id="not-a-uuid", publish_at=tomorrow()).status_code == 422
+
+def test_published_lesson_ids_are_409(db, make_program, make_term, make_lesson):
+    lesson = make_lesson(make_term(make_program()), 1, status=LessonStatus.PUBLISHED)
+    db.commit()
+    error = rejected(db, lesson_ids=[str(lesson.id)], publish_at=tomorrow())
+    assert error.status_code == 409
+    assert error.detail == [f"Lesson {lesson.id} is published and cannot be rescheduled"]